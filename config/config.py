@@ -3,8 +3,11 @@ HR数据处理系统配置文件
 包含所有系统配置和数据映射规则
 """
 import os
-from dataclasses import dataclass
-from typing import Tuple
+import copy
+import json
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 from enum import Enum
 
 class EmployeeType(Enum):
@@ -21,6 +24,10 @@ TARGET_COLUMNS = [
     '用工性质', '最高学历', '岗位名称'
 ]
 
+# 预览模式抽样
+STRATIFY_COLUMNS = ['部门/区县名称', '用工性质']
+SAMPLE_WEIGHT_COLUMN = '抽样权重'
+
 @dataclass
 class FileConfig:
     # 文件配置类
@@ -35,39 +42,22 @@ class FileConfig:
         return file1, file2, output
 
 class DataMappings:
+    # 基础规则表只保留各分公司通用的规则，分公司特有的部门、组织和人员见 ORG_PROFILES 中的 overrides
     # 部门名称映射
     DEPARTMENT_MAPPING = {
-        '客户事业群揭阳市分部': '参考二级组织',
         '党委办公室（办公室、工会、法律部、安全监管部）': '办公室',
         '党委组织部（人力资源与企业发展部）': '人力部',
         '客户服务部': '客服部',
         '党委宣传部（党委统战部、党群工作部）': '党群部',
-        '揭阳办事处': '产互',
-        '纪委驻揭阳市分公司纪律检查组': '纪检组'
     }
     
     # 二级组织映射
     SECONDARY_ORG_MAPPING = {
         '': '政企统筹',
-        '政企客户事业群揭阳市分部政要战略客户部': '政要',
-        '政企客户事业群揭阳市分部企业战略客户部': '企业',
-        '政企客户事业群揭阳市分部新型工业化事业部': '工业',
-        '政企客户事业群揭阳市分部商企营销部': '政企统筹',
-        '政企客户事业群揭阳市分部物联网运营BU': '政企统筹',
-        '政企客户事业群揭阳市分部智网业务BU': '政企统筹',
-        '政企客户事业群揭阳市分部移网业务BU': '政企统筹'
     }
     
     # 特殊人员部门映射
-    SPECIAL_STAFF_MAPPING = {
-        '孙建雄': '安全专班', '林华六': '安全专班', '林淡辉': '安全专班', '邱晓强': '安全专班',
-        '陈创周': '外派-公安局反诈中心', '魏广涛': '外派-公安局反诈中心', 
-        '王少武': '外派-公安局反诈中心', '邓小东': '外派-公安局反诈中心',
-        '李忠': '外派-通建办', '卢鸿生': '外派-通建办',
-        '蔡纯德': '普宁分公司', '赖沛伟': '普宁分公司', '赖锦顺': '普宁分公司',
-        '吴喜坤': '揭东区分公司', '潘锦庭': '揭东区分公司', '林旭生': '揭东区分公司',
-        '林昱': '安委办', '傅新宏': '安委办', '杨晓明': '安委办'
-    }
+    SPECIAL_STAFF_MAPPING = {}
     
     # 一线岗位列表
     FRONTLINE_SALE_POSITIONS = [
@@ -79,7 +69,6 @@ class DataMappings:
 
     # 一线部门列表
     FRONTLINE_DEPARTMENTS = [
-        '榕城区分公司', '揭东区分公司', '普宁分公司', '惠来县分公司', '揭西县分公司',
         '工业', '政要', '企业'
     ]
     FRONTLINE_POSITIONS = [
@@ -97,3 +86,112 @@ class DataMappings:
         '大学': '大学本科', '本科': '大学本科', '无': '大学本科',
         '研究生': '硕士以上'
     }
+
+    def _table_names(self) -> List[str]:
+        return [name for name in dir(self) if name.isupper()]
+
+    def compile(self) -> 'DataMappings':
+        """编译规则表：为列表表预建精确匹配用的frozenset并缓存指纹，编译一次后供各分公司共享"""
+        compiled = DataMappings()
+        for name in self._table_names():
+            value = getattr(self, name)
+            setattr(compiled, name, dict(value) if isinstance(value, dict) else tuple(value))
+        compiled._build_lookup_sets(compiled._table_names())
+        compiled._fingerprint = compiled._compute_fingerprint()
+        return compiled
+
+    def _build_lookup_sets(self, names: List[str]):
+        """重建指定列表表的查找集合，其余集合沿用已有对象"""
+        lookup_sets = dict(self.__dict__.get('_lookup_sets', {}))
+        for name in names:
+            value = getattr(self, name)
+            if not isinstance(value, dict):
+                lookup_sets[name] = frozenset(value)
+        self._lookup_sets = lookup_sets
+
+    def lookup_set(self, name: str) -> frozenset:
+        """列表规则表的精确匹配集合，已编译时直接返回预建的集合"""
+        lookup_sets = self.__dict__.get('_lookup_sets', {})
+        if name in lookup_sets:
+            return lookup_sets[name]
+        return frozenset(getattr(self, name))
+
+    def layered(self, overrides: Dict[str, Any]) -> 'DataMappings':
+        """在当前规则表上叠加覆盖项：字典表按键覆盖，列表表整体替换，未覆盖的表直接共享"""
+        layered = copy.copy(self)
+        for name, value in overrides.items():
+            if name not in self._table_names():
+                raise ValueError(f"未知的规则表: {name}")
+            base = getattr(self, name)
+            if isinstance(base, dict):
+                if not isinstance(value, dict):
+                    raise ValueError(f"规则表 {name} 的覆盖项必须是字典，实际为 {type(value).__name__}")
+                setattr(layered, name, {**base, **value})
+            else:
+                # 字符串也可迭代，不检查会被拆成单个字符
+                if not isinstance(value, (list, tuple)):
+                    raise ValueError(f"规则表 {name} 的覆盖项必须是列表，实际为 {type(value).__name__}")
+                setattr(layered, name, tuple(value))
+        if '_lookup_sets' in self.__dict__:
+            layered._build_lookup_sets(list(overrides))
+        layered._fingerprint = layered._compute_fingerprint()
+        return layered
+
+    def _compute_fingerprint(self) -> str:
+        rules = {name: getattr(self, name) for name in self._table_names()}
+        payload = json.dumps(rules, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def fingerprint(self) -> str:
+        """映射规则指纹，规则有任何变化时指纹随之变化"""
+        return self.__dict__.get('_fingerprint') or self._compute_fingerprint()
+
+
+@dataclass
+class OrgProfile:
+    # 分公司配置：在基础规则表上叠加本分公司的差异项
+    name: str
+    display_name: str
+    base_path: Optional[str] = None
+    overrides: Dict[str, Any] = field(default_factory=dict)
+
+
+# 分公司配置表，overrides 的键为 DataMappings 中的规则表名，例如：
+#   'shantou': OrgProfile('shantou', '汕头', base_path=r"D:\...\汕头\2025", overrides={
+#       'DEPARTMENT_MAPPING': {'纪委驻汕头市分公司纪律检查组': '纪检组'},
+#       'SPECIAL_STAFF_MAPPING': {'张三': '安全专班'},
+#       'FRONTLINE_DEPARTMENTS': ['金平区分公司', '工业', '政要', '企业'],
+#   }),
+ORG_PROFILES: Dict[str, OrgProfile] = {
+    'jieyang': OrgProfile('jieyang', '揭阳', base_path=FileConfig.base_path, overrides={
+        'DEPARTMENT_MAPPING': {
+            '客户事业群揭阳市分部': '参考二级组织',
+            '揭阳办事处': '产互',
+            '纪委驻揭阳市分公司纪律检查组': '纪检组',
+        },
+        'SECONDARY_ORG_MAPPING': {
+            '政企客户事业群揭阳市分部政要战略客户部': '政要',
+            '政企客户事业群揭阳市分部企业战略客户部': '企业',
+            '政企客户事业群揭阳市分部新型工业化事业部': '工业',
+            '政企客户事业群揭阳市分部商企营销部': '政企统筹',
+            '政企客户事业群揭阳市分部物联网运营BU': '政企统筹',
+            '政企客户事业群揭阳市分部智网业务BU': '政企统筹',
+            '政企客户事业群揭阳市分部移网业务BU': '政企统筹',
+        },
+        'SPECIAL_STAFF_MAPPING': {
+            '孙建雄': '安全专班', '林华六': '安全专班', '林淡辉': '安全专班', '邱晓强': '安全专班',
+            '陈创周': '外派-公安局反诈中心', '魏广涛': '外派-公安局反诈中心',
+            '王少武': '外派-公安局反诈中心', '邓小东': '外派-公安局反诈中心',
+            '李忠': '外派-通建办', '卢鸿生': '外派-通建办',
+            '蔡纯德': '普宁分公司', '赖沛伟': '普宁分公司', '赖锦顺': '普宁分公司',
+            '吴喜坤': '揭东区分公司', '潘锦庭': '揭东区分公司', '林旭生': '揭东区分公司',
+            '林昱': '安委办', '傅新宏': '安委办', '杨晓明': '安委办',
+        },
+        # 列表表整体替换，需包含基础表中的通用项
+        'FRONTLINE_DEPARTMENTS': [
+            '榕城区分公司', '揭东区分公司', '普宁分公司', '惠来县分公司', '揭西县分公司',
+            '工业', '政要', '企业',
+        ],
+    }),
+}
+DEFAULT_ORG = 'jieyang'
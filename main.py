@@ -8,8 +8,11 @@ HR数据管理系统主程序 - 自动化版本
 import os
 import sys
 import argparse
+from dataclasses import replace
 from datetime import datetime
+from config.config import DataMappings, ORG_PROFILES, DEFAULT_ORG
 from module.HR_manager import HRDataManager
+from module.multi_org import process_all_orgs
 
 
 def print_banner():
@@ -31,7 +34,22 @@ def get_current_month():
         return current_date.month - 1
 
 
-def setup_hr_manager(base_path=None, output_folder='./output'):
+def prompt_file_paths():
+    """交互选择输入方式，完整路径模式返回 (文件1, 文件2, 合并输出)，快速模式返回None"""
+    print("请选择输入方式:")
+    print("1. 快速模式 - 按月份使用默认文件")
+    print("2. 完整路径模式 - 手动输入完整文件路径")
+    input_choice = input("\n请选择模式（1或2）：").strip()
+    if input_choice != "2":
+        return None
+
+    file1_path = input("请输入第一个Excel文件路径: ").strip().strip('"')
+    file2_path = input("请输入第二个Excel文件路径: ").strip().strip('"')
+    output_path = input("请输入输出文件路径（回车使用默认名称 merged_data.xlsx）: ").strip().strip('"')
+    return file1_path, file2_path, output_path or "merged_data.xlsx"
+
+
+def setup_hr_manager(base_path=None, output_folder='./output', mappings=None):
     """初始化HR管理器"""
     print("🔧 系统初始化中...")
     
@@ -39,7 +57,7 @@ def setup_hr_manager(base_path=None, output_folder='./output'):
     os.makedirs(output_folder, exist_ok=True)
     
     try:
-        hr_manager = HRDataManager(base_path=base_path, output_folder=output_folder)
+        hr_manager = HRDataManager(base_path=base_path, output_folder=output_folder, mappings=mappings)
         print(f"✅ 系统初始化完成")
         print(f"📁 输出目录: {os.path.abspath(output_folder)}")
         return hr_manager
@@ -48,18 +66,20 @@ def setup_hr_manager(base_path=None, output_folder='./output'):
         return None
 
 
-def auto_process_workflow(hr_manager, month=None, apply_mappings=True):
+def auto_process_workflow(hr_manager, month=None, apply_mappings=True, force=False, formats=None, file_paths=None):
     """自动执行完整工作流程"""
     if month is None:
         month = get_current_month()
     
     print(f"🚀 开始自动处理 {month} 月份数据...")
     print(f"📊 数据映射: {'启用' if apply_mappings else '禁用'}")
+    if force:
+        print("♻️  强制重新执行所有阶段")
     print("=" * 50)
     
     try:
         # 执行完整工作流程
-        report_path = hr_manager.process_monthly_workflow(month)
+        report_path = hr_manager.process_monthly_workflow(month, apply_mappings, force, formats, file_paths)
         
         if report_path:
             print("=" * 50)
@@ -77,6 +97,76 @@ def auto_process_workflow(hr_manager, month=None, apply_mappings=True):
         return False
 
 
+def preview_workflow(hr_manager, month=None, apply_mappings=True, formats=None, max_scan_rows=10000,
+                     file_paths=None):
+    """预览模式 - 基于分层抽样快速生成报告草稿"""
+    if month is None:
+        month = get_current_month()
+
+    print(f"👀 开始生成 {month} 月份预览报告（抽样估计）...")
+    print("=" * 50)
+
+    try:
+        report_path = hr_manager.process_preview_workflow(month, apply_mappings, formats=formats,
+                                                         max_scan_rows=max_scan_rows or None,
+                                                         file_paths=file_paths)
+
+        if report_path:
+            print("=" * 50)
+            print("🎉 预览报告生成成功!")
+            print(f"📄 报告草稿: {os.path.abspath(report_path)}")
+            print("⚠️  人数与占比为抽样估计值，请以正式报告为准")
+            return True
+        else:
+            print("❌ 预览报告生成失败")
+            return False
+
+    except Exception as e:
+        print(f"❌ 预览过程中发生错误: {e}")
+        return False
+
+
+def multi_org_workflow(base_path=None, output_folder='./output', month=None, apply_mappings=True,
+                       force=False, formats=None):
+    """多分公司模式 - 各分公司并行处理并生成汇总报告"""
+    if month is None:
+        month = get_current_month()
+
+    profiles = list(ORG_PROFILES.values())
+    if base_path:
+        # 指定基础路径时，各分公司数据位于其下以分公司名称命名的子目录
+        profiles = [replace(profile, base_path=os.path.join(base_path, profile.name)) for profile in profiles]
+
+    print(f"🏢 开始并行处理 {len(profiles)} 个分公司 {month} 月份数据...")
+    print(f"📋 分公司: {', '.join(profile.display_name for profile in profiles)}")
+    print("=" * 50)
+    os.makedirs(output_folder, exist_ok=True)
+
+    try:
+        summary_path, failed = process_all_orgs(profiles, month, output_folder, apply_mappings, force, formats)
+
+        if summary_path and failed:
+            print("=" * 50)
+            print(f"⚠️  以下分公司处理失败: {', '.join(failed)}")
+            print(f"📄 汇总报告（不完整）: {os.path.abspath(summary_path)}")
+            print("❌ 汇总数据不完整，请修复后重新运行")
+            return False
+        elif summary_path:
+            print("=" * 50)
+            print("🎉 多分公司流程执行完成!")
+            print(f"📄 汇总报告: {os.path.abspath(summary_path)}")
+            print(f"📅 处理月份: {month}月")
+            print(f"⏰ 完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            return True
+        else:
+            print("❌ 多分公司流程执行失败")
+            return False
+
+    except Exception as e:
+        print(f"❌ 多分公司流程执行过程中发生错误: {e}")
+        return False
+
+
 def main():
     """主函数 - 自动化版本"""
     # 命令行参数解析
@@ -89,10 +179,31 @@ def main():
                        help='输出文件夹路径，默认为 ./output')
     parser.add_argument('--no-mappings', action='store_true',
                        help='禁用数据映射和清洗，仅进行原始数据合并')
+    parser.add_argument('--file1', type=str,
+                       help='完整路径模式：第一个Excel文件路径（需与 --file2 同时指定）')
+    parser.add_argument('--file2', type=str,
+                       help='完整路径模式：第二个Excel文件路径（需与 --file1 同时指定）')
+    parser.add_argument('--merged-output', type=str, default='merged_data.xlsx',
+                       help='完整路径模式：合并结果输出路径，默认为 merged_data.xlsx')
+    parser.add_argument('--force', action='store_true',
+                       help='忽略缓存，重新执行所有阶段')
+    parser.add_argument('--preview', action='store_true',
+                       help='预览模式，基于分层抽样快速生成报告草稿')
+    parser.add_argument('--preview-scan-rows', type=int, default=10000,
+                       help='预览模式下每个文件最多扫描的行数，0 表示全量扫描，默认为 10000')
+    parser.add_argument('--formats', nargs='+', choices=['xlsx', 'csv', 'html', 'json'],
+                       help='报告输出格式，默认输出全部格式')
+    parser.add_argument('--org', type=str, choices=list(ORG_PROFILES) + ['all'],
+                       help=f'分公司配置，all 表示并行处理全部分公司，默认为 {DEFAULT_ORG}')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='详细输出模式')
     
     args = parser.parse_args()
+    if bool(args.file1) != bool(args.file2):
+        parser.error('--file1 与 --file2 需同时指定')
+    if args.file1 and args.org == 'all':
+        parser.error('--file1/--file2 不能与 --org all 同时使用')
+    file_paths = (args.file1, args.file2, args.merged_output) if args.file1 else None
     
     print_banner()
     
@@ -104,12 +215,38 @@ def main():
         print(f"   - 基础路径: {args.base_path or '默认'}")
         print(f"   - 输出路径: {args.output}")
         print(f"   - 数据映射: {'禁用' if args.no_mappings else '启用'}")
+        print(f"   - 强制重跑: {'是' if args.force else '否'}")
+        print(f"   - 预览模式: {'是' if args.preview else '否'}")
+        print(f"   - 报告格式: {', '.join(args.formats) if args.formats else '全部'}")
+        print(f"   - 分公司: {args.org or DEFAULT_ORG}")
         print()
-    
+
+    # 多分公司模式
+    if args.org == 'all':
+        if args.preview:
+            print("❌ 预览模式暂不支持 --org all")
+            return 1
+        try:
+            success = multi_org_workflow(
+                base_path=args.base_path,
+                output_folder=args.output,
+                month=args.month,
+                apply_mappings=not args.no_mappings,
+                force=args.force,
+                formats=args.formats
+            )
+        except KeyboardInterrupt:
+            print("\n\n⏹️  程序被用户中断")
+            return 1
+        print("\n🎯 程序执行完成!" if success else "\n⚠️  程序执行失败!")
+        return 0 if success else 1
+
     # 初始化HR管理器
-    hr_manager = q(
-        base_path=args.base_path,
-        output_folder=args.output
+    profile = ORG_PROFILES[args.org or DEFAULT_ORG]
+    hr_manager = setup_hr_manager(
+        base_path=args.base_path or profile.base_path,
+        output_folder=args.output,
+        mappings=DataMappings().compile().layered(profile.overrides)
     )
     
     if not hr_manager:
@@ -120,11 +257,24 @@ def main():
     
     # 自动执行工作流程
     try:
-        success = auto_process_workflow(
-            hr_manager=hr_manager,
-            month=args.month,
-            apply_mappings=not args.no_mappings
-        )
+        if args.preview:
+            success = preview_workflow(
+                hr_manager=hr_manager,
+                month=args.month,
+                apply_mappings=not args.no_mappings,
+                formats=args.formats,
+                max_scan_rows=args.preview_scan_rows,
+                file_paths=file_paths
+            )
+        else:
+            success = auto_process_workflow(
+                hr_manager=hr_manager,
+                month=args.month,
+                apply_mappings=not args.no_mappings,
+                force=args.force,
+                formats=args.formats,
+                file_paths=file_paths
+            )
         
         if success:
             print("\n🎯 程序执行完成!")
@@ -163,8 +313,9 @@ def simple_auto_run():
     # 自动执行
     month = get_current_month()
     print(f"📅 自动检测处理月份: {month}月")
+    file_paths = prompt_file_paths()
     
-    success = auto_process_workflow(hr_manager, month)
+    success = auto_process_workflow(hr_manager, month, file_paths=file_paths)
     
     if success:
         print("\n🎯 自动化处理完成!")
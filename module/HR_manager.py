@@ -1,87 +1,154 @@
-from config.config import FileConfig, DataMappings
+import os
+import pickle
+import config.config as config_module
+from config.config import FileConfig, DataMappings, TARGET_COLUMNS, ORG_PROFILES, DEFAULT_ORG
 from .data_processor import DataProcessor
 from .excel_merger import ExcelMerger
 from .report_generator import ReportGenerator
-from typing import Optional, Dict
+from .pipeline import Stage, StagePipeline, file_digest, code_version
+from .sampler import StratifiedSampler
+from typing import Optional, Dict, List, Tuple
 
 class HRDataManager:
-    def __init__(self, base_path: str = None, output_folder: str = './output'):
-        self.file_config = FileConfig(base_path=base_path, output_folder=output_folder)
-        self.mappings = DataMappings()
+    def __init__(self, base_path: str = None, output_folder: str = './output', mappings: Optional[DataMappings] = None):
+        self.file_config = FileConfig(base_path=base_path or FileConfig.base_path, output_folder=output_folder)
+        if mappings is None:
+            # 未指定规则表时使用默认分公司的规则
+            mappings = DataMappings().compile().layered(ORG_PROFILES[DEFAULT_ORG].overrides)
+        self.mappings = mappings
         self.processor = DataProcessor(self.mappings)
         self.merger = ExcelMerger(self.processor, self.file_config)
         self.report_generator = ReportGenerator(self.file_config)
 
-    def merge_monthly_data(self, month: int, apply_mappings: bool = True) -> Optional[str]:
-        """合并指定月份的数据"""
-        print("请选择输入方式:")
-        print("1. 快速模式 - 只输入月份数字")
-        print("2. 完整路径模式 - 手动输入完整文件路径")
-        input_choice = input("\n请选择模式（1或2）：").strip()
+    def resolve_files(self, month: int, file_paths: Optional[Tuple[str, str, str]] = None) -> Tuple[str, str, str]:
+        """返回 (文件1, 文件2, 合并输出) 路径：未指定完整路径时按月份使用默认文件名"""
+        if file_paths is not None:
+            return file_paths
+        return self.file_config.get_monthly_files(month)
 
-        if input_choice == "1":
-            try:
-                file1_path, file2_path, output_path = self.file_config.get_monthly_files(month)
+    def build_monthly_pipeline(self, month: int, apply_mappings: bool = True,
+                               formats: Optional[List[str]] = None,
+                               file_paths: Optional[Tuple[str, str, str]] = None) -> StagePipeline:
+        """构建月度工作流: 合并 -> 统计 -> 各格式报告（并发渲染）"""
+        formats = list(dict.fromkeys(formats or ReportGenerator.RENDERERS))
+        file1_path, file2_path, output_path = self.resolve_files(month, file_paths)
+        pipeline = StagePipeline(os.path.join(self.file_config.output_folder, '.cache'))
 
-                merged_df = self.merger.merge_files(file1_path, file2_path, month, apply_mappings)
-                if merged_df is None:
-                    print("合并失败，可能是文件不存在或格式不正确。")
-                    return None
-                
-                merged_df.to_excel(output_path, index=False)
-                return output_path
-            except Exception as e:
-                print(f"合并数据时出错: {e}")
-                return None
-            
-        elif input_choice == "2":
-            # 完整路径模式
-            file1_path = input("请输入第一个Excel文件路径: ").strip().strip('"')
-            file2_path = input("请输入第二个Excel文件路径: ").strip().strip('"')
-            output_path = input("请输入输出文件路径（回车使用默认名称 merged_data.xlsx）: ").strip().strip('"')
-            if not output_path:
-                output_path = "merged_data.xlsx"
-            
-            try:
-                merged_df = self.merger.merge_files(file1_path, file2_path, month, apply_mappings)
-                if merged_df is None:
-                    return None
-                
-                # 保存合并后的数据
-                merged_df.to_excel(output_path, index=False)
-                
-                return output_path
-                
-            except Exception as e:
-                print(f"合并数据时出错: {e}")
-                return None
-            
+        def run_merge(deps: Dict[str, str], target: str) -> bool:
+            merged_df = self.merger.merge_files(file1_path, file2_path, month, apply_mappings)
+            if merged_df is None:
+                print("合并失败，可能是文件不存在或格式不正确。")
+                return False
+            merged_df.to_excel(target, index=False)
+            return True
 
-    def generate_monthly_report(self, merged_data_path: str) -> Optional[str]:
-        try:
-            df = self.report_generator.load_merge_data(merged_data_path)
+        def run_stats(deps: Dict[str, str], target: str) -> bool:
+            df = self.report_generator.load_merge_data(deps['merge'])
             if df is None:
-                print("加载合并数据失败，无法生成报告。")
-                return None
-            
+                return False
             stats = self.report_generator.generate_summary_stats(df)
-            report_path = self.report_generator.create_excel_report(stats)
-            return report_path
+            with open(target, 'wb') as f:
+                pickle.dump(stats, f)
+            return True
+
+        def make_report_runner(fmt: str):
+            def run_report(deps: Dict[str, str], target: str) -> bool:
+                with open(deps['stats'], 'rb') as f:
+                    stats = pickle.load(f)
+                self.report_generator.render(fmt, stats, target)
+                return True
+            return run_report
+
+        pipeline.add_stage(Stage(
+            name='merge',
+            run=run_merge,
+            code=code_version(ExcelMerger, DataProcessor, config_module),
+            suffix='.xlsx',
+            inputs=lambda: {
+                'file1': file_digest(file1_path),
+                'file2': file_digest(file2_path),
+                'mappings': self.mappings.fingerprint(),
+                'columns': TARGET_COLUMNS,
+                'month': month,
+                'apply_mappings': apply_mappings,
+            },
+            publish_to=output_path,
+        ))
+        pipeline.add_stage(Stage(
+            name='stats',
+            run=run_stats,
+            # 统计依赖 EmployeeType、SAMPLE_WEIGHT_COLUMN 等配置，配置模块一并计入代码版本
+            code=code_version(*ReportGenerator.stats_code(), config_module),
+            suffix='.pkl',
+            deps=['merge'],
+        ))
+        for fmt in formats:
+            pipeline.add_stage(Stage(
+                name=f'report_{fmt}',
+                run=make_report_runner(fmt),
+                code=code_version(*ReportGenerator.renderer_code(fmt), config_module),
+                suffix=f'.{fmt}',
+                inputs=lambda: {'current_month': self.report_generator.current_month},
+                deps=['stats'],
+                publish_to=self.report_generator.default_report_path(fmt=fmt),
+            ))
+        return pipeline
+
+    def run_monthly_pipeline(self, month: int, apply_mappings: bool = True, force: bool = False,
+                             formats: Optional[List[str]] = None,
+                             file_paths: Optional[Tuple[str, str, str]] = None) -> Optional[Dict[str, str]]:
+        """执行月度工作流，输入未变化的阶段会被跳过，返回各阶段产物路径"""
+        pipeline = self.build_monthly_pipeline(month, apply_mappings, formats, file_paths)
+        try:
+            artifacts = pipeline.run(force=force)
         except Exception as e:
-            print(f"生成报告时出错: {e}")
+            print(f"工作流执行出错: {e}")
             return None
-        
-    def process_monthly_workflow(self, month:int) -> Optional[str]:
-        
-        merged_data_path = self.merge_monthly_data(month)
-        if merged_data_path is None:
-            print("数据合并失败，无法继续生成报告。")
+        if artifacts is None:
+            print("工作流执行失败。")
+        return artifacts
+
+    def process_monthly_workflow(self, month: int, apply_mappings: bool = True, force: bool = False,
+                                 formats: Optional[List[str]] = None,
+                                 file_paths: Optional[Tuple[str, str, str]] = None) -> Optional[str]:
+        """执行月度工作流，返回主报告路径；file_paths 为 (文件1, 文件2, 合并输出) 完整路径"""
+        formats = formats or list(ReportGenerator.RENDERERS)
+        if self.run_monthly_pipeline(month, apply_mappings, force, formats, file_paths) is None:
             return None
-        
-        report_path = self.generate_monthly_report(merged_data_path)
-        if report_path is None:
-            print("报告生成失败。")
+
+        report_paths = {fmt: self.report_generator.default_report_path(fmt=fmt) for fmt in formats}
+        for fmt, path in report_paths.items():
+            print(f"工作流处理完成，{fmt}报告已保存到: {path}")
+        return report_paths.get('xlsx', report_paths[formats[0]])
+
+    def process_preview_workflow(self, month: int, apply_mappings: bool = True, sample_size: int = 2000,
+                                 formats: Optional[List[str]] = None,
+                                 max_scan_rows: Optional[int] = 10000,
+                                 file_paths: Optional[Tuple[str, str, str]] = None) -> Optional[str]:
+        """预览模式：基于分层抽样数据快速生成报告草稿，每个文件最多等间隔解析max_scan_rows行"""
+        file1_path, file2_path, _ = self.resolve_files(month, file_paths)
+        sampler = StratifiedSampler(sample_size=sample_size, max_scan_rows=max_scan_rows)
+        try:
+            df1 = sampler.sample_file(file1_path)
+            df2 = sampler.sample_file(file2_path)
+            if df1 is None or df2 is None:
+                print("抽样失败，可能是文件不存在或格式不正确。")
+                return None
+
+            merged_df = self.merger.merge_frames(df1, df2, month, apply_mappings)
+            if merged_df is None:
+                print("抽样数据合并失败。")
+                return None
+
+            formats = formats or list(ReportGenerator.RENDERERS)
+            stats = self.report_generator.generate_summary_stats(merged_df)
+            if sampler.partial_files:
+                stats['预览']['部分解析'] = sampler.partial_files
+            report_paths = self.report_generator.render_reports(stats, formats)
+        except Exception as e:
+            print(f"生成预览报告时出错: {e}")
             return None
-        
-        print(f"工作流处理完成，报告已保存到: {report_path}")
-        return report_path
+
+        for fmt, path in report_paths.items():
+            print(f"预览处理完成，{fmt}报告草稿已保存到: {path}")
+        return report_paths.get('xlsx', report_paths[formats[0]])
@@ -10,6 +10,10 @@ class DataProcessor:
     """数据处理核心类"""
     def __init__(self, mappings: DataMappings):
         self.mappings = mappings
+        # 精确匹配用的查找集合，规则表已编译时直接共享
+        self.frontline_sale_positions = mappings.lookup_set('FRONTLINE_SALE_POSITIONS')
+        self.frontline_departments = mappings.lookup_set('FRONTLINE_DEPARTMENTS')
+        self.frontline_positions = mappings.lookup_set('FRONTLINE_POSITIONS')
 
     def apply_department_mappings(self, department_name: str, secondary_org_name: Optional[str] = None) -> str:
         if pd.isna(department_name) or department_name == '':
@@ -31,7 +35,7 @@ class DataProcessor:
             return '否'
         
         position_str = str(position).strip()
-        if position_str in self.mappings.FRONTLINE_SALE_POSITIONS:
+        if position_str in self.frontline_sale_positions:
             return '是'
         
         # 模糊匹配
@@ -47,9 +51,9 @@ class DataProcessor:
             return '否'
         department_str = str(department).strip()
         position_str = str(position).strip()
-        if department_str in self.mappings.FRONTLINE_DEPARTMENTS:
+        if department_str in self.frontline_departments:
             return '是'
-        if position_str in self.mappings.FRONTLINE_POSITIONS:
+        if position_str in self.frontline_positions:
             return '是'
         
         # 模糊匹配
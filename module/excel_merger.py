@@ -5,7 +5,7 @@ Excel合并模块
 import pandas as pd
 import os
 from .data_processor import DataProcessor
-from config.config import FileConfig, TARGET_COLUMNS
+from config.config import FileConfig, TARGET_COLUMNS, SAMPLE_WEIGHT_COLUMN
 from typing import Optional
 
 class ExcelMerger:
@@ -28,7 +28,13 @@ class ExcelMerger:
         for col in missing_columns:
             extracted_df[col] = ''
 
-        return extracted_df[self.target_columns]
+        # 预览模式的抽样权重随数据保留
+        output_columns = list(self.target_columns)
+        if SAMPLE_WEIGHT_COLUMN in df.columns:
+            extracted_df[SAMPLE_WEIGHT_COLUMN] = df[SAMPLE_WEIGHT_COLUMN]
+            output_columns.append(SAMPLE_WEIGHT_COLUMN)
+
+        return extracted_df[output_columns]
     
     def merge_files(self, file1_path: str, file2_path: str, month: int, apply_mappings: bool = True) -> Optional[pd.DataFrame]:
         try:
@@ -40,6 +46,15 @@ class ExcelMerger:
             df1 = pd.read_excel(file1_path, skiprows=1)
             df2 = pd.read_excel(file2_path, skiprows=1)
 
+            return self.merge_frames(df1, df2, month, apply_mappings)
+
+        except Exception as e:
+            print(f"合并文件时出错: {e}")
+            return None
+
+    def merge_frames(self, df1: pd.DataFrame, df2: pd.DataFrame, month: int, apply_mappings: bool = True) -> Optional[pd.DataFrame]:
+        """合并已读取的两份数据"""
+        try:
             df1_extracted = self.extract_target_columns(df1, "文件1")
             df2_extracted = self.extract_target_columns(df2, "文件2")
 
@@ -49,8 +64,10 @@ class ExcelMerger:
             if apply_mappings:
                 merge_df = self._apply_all_mappings(merge_df, month)
 
+            # 去重不比较抽样权重，同一人来自不同分层或文件时仍视为重复
             initial_count = len(merge_df)
-            merge_df = merge_df.drop_duplicates()
+            dedup_columns = [col for col in merge_df.columns if col != SAMPLE_WEIGHT_COLUMN]
+            merge_df = merge_df.drop_duplicates(subset=dedup_columns)
             final_count = len(merge_df)
             if initial_count != final_count:
                 print(f"去除重复数据: {initial_count-final_count} 行")
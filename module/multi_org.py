@@ -0,0 +1,81 @@
+"""
+多分公司处理模块
+基础规则表只编译一次并下发到各工作进程，分公司配置在其上叠加差异项后并行处理
+"""
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from config.config import DataMappings, FileConfig, OrgProfile
+from .HR_manager import HRDataManager
+from .report_generator import ReportGenerator
+from typing import Dict, List, Optional, Tuple
+
+# 工作进程内共享的已编译基础规则表
+_BASE_MAPPINGS: Optional[DataMappings] = None
+
+
+def _init_worker(base_mappings: DataMappings):
+    global _BASE_MAPPINGS
+    _BASE_MAPPINGS = base_mappings
+
+
+def _process_org(profile: OrgProfile, month: int, output_folder: str, apply_mappings: bool,
+                 force: bool, formats: Optional[List[str]]) -> Optional[Dict]:
+    """在工作进程中处理单个分公司，返回统计结果"""
+    print(f"[{profile.display_name}] 开始处理...")
+    mappings = _BASE_MAPPINGS.layered(profile.overrides)
+    hr_manager = HRDataManager(
+        base_path=profile.base_path,
+        output_folder=os.path.join(output_folder, profile.name),
+        mappings=mappings,
+    )
+    artifacts = hr_manager.run_monthly_pipeline(month, apply_mappings, force, formats)
+    if artifacts is None:
+        print(f"[{profile.display_name}] 处理失败")
+        return None
+
+    with open(artifacts['stats'], 'rb') as f:
+        stats = pickle.load(f)
+    print(f"[{profile.display_name}] 处理完成，总人数: {stats['总人数']}")
+    return stats
+
+
+def process_all_orgs(profiles: List[OrgProfile], month: int, output_folder: str = './output',
+                     apply_mappings: bool = True, force: bool = False,
+                     formats: Optional[List[str]] = None,
+                     max_workers: Optional[int] = None) -> Tuple[Optional[str], List[str]]:
+    """多进程并行处理各分公司，返回 (跨分公司汇总报告路径, 处理失败的分公司)"""
+    # 未配置数据目录的分公司会落到默认目录，读到其他分公司的数据，必须事先拒绝
+    missing = [profile.display_name for profile in profiles if not profile.base_path]
+    if missing:
+        raise ValueError(f"以下分公司未配置数据目录 base_path: {missing}，请在 ORG_PROFILES 中配置或使用 --base-path 指定")
+
+    base_mappings = DataMappings().compile()
+    max_workers = max_workers or min(len(profiles), os.cpu_count() or 1)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(base_mappings,)) as executor:
+        futures = {
+            profile.display_name: executor.submit(
+                _process_org, profile, month, output_folder, apply_mappings, force, formats
+            )
+            for profile in profiles
+        }
+        org_stats = {}
+        for name, future in futures.items():
+            try:
+                stats = future.result()
+            except Exception as e:
+                print(f"[{name}] 处理出错: {e}")
+                stats = None
+            if stats is not None:
+                org_stats[name] = stats
+
+    failed = [profile.display_name for profile in profiles if profile.display_name not in org_stats]
+    if failed:
+        print(f"以下分公司处理失败: {failed}")
+    if not org_stats:
+        return None, failed
+
+    report_generator = ReportGenerator(FileConfig(output_folder=output_folder))
+    return report_generator.create_consolidated_report(org_stats, failed_orgs=failed), failed
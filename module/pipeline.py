@@ -0,0 +1,133 @@
+"""
+工作流阶段模块
+将月度流程建模为阶段依赖图，按输入哈希缓存各阶段产物，输入未变化的阶段直接跳过
+"""
+import os
+import json
+import shutil
+import hashlib
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+
+def file_digest(file_path: str) -> Optional[str]:
+    """计算文件内容哈希，文件不存在时返回None"""
+    if not os.path.exists(file_path):
+        return None
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_version(*objects) -> str:
+    """根据类或函数的源码计算代码版本"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode('utf-8'))
+    return digest.hexdigest()
+
+
+_log_lock = threading.Lock()
+
+
+def _log(message: str):
+    """整行输出日志，避免并发阶段的输出混在同一行"""
+    with _log_lock:
+        print(message, flush=True)
+
+
+@dataclass
+class Stage:
+    """工作流阶段
+
+    inputs返回本阶段的外部输入（文件哈希、映射指纹等），deps为上游阶段名称，
+    run接收上游产物路径和本阶段产物的目标路径，成功时返回True。
+    publish_to不为空时，产物会复制到该路径供用户使用。
+    """
+    name: str
+    run: Callable[[Dict[str, str], str], bool]
+    code: str
+    suffix: str
+    inputs: Callable[[], Dict] = dict
+    deps: List[str] = field(default_factory=list)
+    publish_to: Optional[str] = None
+
+
+class StagePipeline:
+    def __init__(self, cache_folder: str):
+        self.cache_folder = cache_folder
+        self.stages: List[Stage] = []
+
+    def add_stage(self, stage: Stage):
+        """按依赖顺序添加阶段，阶段名称不可重复"""
+        known = {s.name for s in self.stages}
+        if stage.name in known:
+            raise ValueError(f"阶段 {stage.name} 已存在")
+        missing = [dep for dep in stage.deps if dep not in known]
+        if missing:
+            raise ValueError(f"阶段 {stage.name} 依赖未定义的阶段: {missing}")
+        self.stages.append(stage)
+
+    def _stage_key(self, stage: Stage, keys: Dict[str, str]) -> str:
+        payload = json.dumps({
+            'name': stage.name,
+            'code': stage.code,
+            'inputs': stage.inputs(),
+            'deps': {dep: keys[dep] for dep in stage.deps},
+        }, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _run_stage(self, stage: Stage, key: str, artifacts: Dict[str, str], force: bool) -> Optional[str]:
+        """执行单个阶段（输入未变化时跳过），返回产物路径"""
+        stage_folder = os.path.join(self.cache_folder, stage.name)
+        os.makedirs(stage_folder, exist_ok=True)
+        artifact = os.path.join(stage_folder, f"{key[:16]}{stage.suffix}")
+
+        if os.path.exists(artifact) and not force:
+            _log(f"阶段 {stage.name}: 输入未变化，跳过")
+        else:
+            _log(f"阶段 {stage.name}: 执行中...")
+            tmp_artifact = os.path.join(stage_folder, f"{key[:16]}.tmp{stage.suffix}")
+            try:
+                ok = stage.run({dep: artifacts[dep] for dep in stage.deps}, tmp_artifact)
+            except Exception as e:
+                _log(f"阶段 {stage.name} 执行出错: {e}")
+                ok = False
+            if not ok or not os.path.exists(tmp_artifact):
+                _log(f"阶段 {stage.name} 执行失败")
+                return None
+            os.replace(tmp_artifact, artifact)
+
+        if stage.publish_to:
+            shutil.copyfile(artifact, stage.publish_to)
+            _log(f"阶段 {stage.name}: 已输出到 {stage.publish_to}")
+        return artifact
+
+    def run(self, force: bool = False, max_workers: int = 4) -> Optional[Dict[str, str]]:
+        """按依赖分批执行各阶段，同一批内互不依赖的阶段在线程池中并发执行，返回各阶段产物路径"""
+        keys: Dict[str, str] = {}
+        artifacts: Dict[str, str] = {}
+        pending = list(self.stages)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending:
+                ready = [stage for stage in pending if all(dep in artifacts for dep in stage.deps)]
+                batch_keys = {stage.name: self._stage_key(stage, keys) for stage in ready}
+                futures = {
+                    stage.name: executor.submit(self._run_stage, stage, batch_keys[stage.name], artifacts, force)
+                    for stage in ready
+                }
+                results = {name: future.result() for name, future in futures.items()}
+                if any(artifact is None for artifact in results.values()):
+                    return None
+
+                keys.update(batch_keys)
+                artifacts.update(results)
+                pending = [stage for stage in pending if stage.name not in results]
+
+        return artifacts
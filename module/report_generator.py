@@ -1,18 +1,45 @@
 import os
+import csv
+import html
+import json
 import pandas as pd
-from config.config import FileConfig, EmployeeType
+from config.config import FileConfig, EmployeeType, SAMPLE_WEIGHT_COLUMN
 from openpyxl import Workbook
 from openpyxl.styles import Font
 from datetime import datetime
-from typing import Optional, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Tuple
 from dateutil.relativedelta import relativedelta
 
 class ReportGenerator:
+    # 报告格式 -> (渲染方法, 渲染所用的辅助方法)
+    # 两者共同决定工作流中报告阶段的代码版本，修改渲染逻辑时需同步维护
+    RENDERERS = {
+        'xlsx': ('create_excel_report',
+                 ('_format_ratio', '_preview_note', '_create_summary_sheet', '_create_department_sheet')),
+        'csv': ('create_csv_report', ('_stat_tables', '_format_ratio')),
+        'html': ('create_html_report', ('_stat_tables', '_format_ratio', '_preview_note')),
+        'json': ('create_json_report', ('_stat_tables',)),
+    }
+    # 统计结果所依赖的方法，决定统计阶段的代码版本
+    STATS_METHODS = ('load_merge_data', '_count_by', '_total', 'generate_summary_stats')
+
     def __init__(self, file_config: FileConfig):
         self.file_config = file_config
         self.current_month = (datetime.now() - relativedelta(months=1)).strftime('%Y%m')
         os.makedirs(file_config.output_folder, exist_ok=True)
 
+    @classmethod
+    def stats_code(cls) -> list:
+        """统计阶段依赖的方法"""
+        return [getattr(cls, name) for name in cls.STATS_METHODS]
+
+    @classmethod
+    def renderer_code(cls, fmt: str) -> list:
+        """指定格式报告阶段依赖的方法"""
+        method, helpers = cls.RENDERERS[fmt]
+        return [getattr(cls, name) for name in (method,) + helpers]
+
     def load_merge_data(self, data_path: str) -> Optional[pd.DataFrame]:
         """加载合并文件"""
         try:
@@ -28,72 +55,283 @@ class ReportGenerator:
             print(f'加载数据时出错: {e}')
             return None
         
+    def _count_by(self, df: pd.DataFrame, column: str) -> dict:
+        """按列计数，带抽样权重时按权重推算"""
+        if column not in df.columns or len(df) == 0:
+            return {}
+        if SAMPLE_WEIGHT_COLUMN not in df.columns:
+            return df[column].value_counts().to_dict()
+        counts = df.groupby(column)[SAMPLE_WEIGHT_COLUMN].sum().round().astype(int)
+        return counts.sort_values(ascending=False).to_dict()
+
+    def _total(self, df: pd.DataFrame) -> int:
+        if SAMPLE_WEIGHT_COLUMN not in df.columns:
+            return len(df)
+        return int(round(df[SAMPLE_WEIGHT_COLUMN].sum()))
+
     def generate_summary_stats(self, df: pd.DataFrame) -> dict:
         """生成数据统计"""
         stats = {
-            '总人数': len(df),
-            '性别结构': df['性别'].value_counts().to_dict() if '性别' in df.columns else {},
-            '学历结构': df['学历分组'].value_counts().to_dict() if '学历分组' in df.columns else {},
-            '年龄结构': df['年龄段'].value_counts().to_dict() if '年龄段' in df.columns else {},
-            '用工性质': df['用工性质'].value_counts().to_dict() if '用工性质' in df.columns else {},
+            '总人数': self._total(df),
+            '性别结构': self._count_by(df, '性别'),
+            '学历结构': self._count_by(df, '学历分组'),
+            '年龄结构': self._count_by(df, '年龄段'),
+            '用工性质': self._count_by(df, '用工性质'),
         }
 
         # 合同制员工统计
         if '用工性质' in df.columns:
             contract_data = df[df['用工性质'] == EmployeeType.CONTRACT.value]
             stats['合同制员工'] = {
-                '总人数': len(contract_data),
-                '性别结构': contract_data['性别'].value_counts().to_dict() if len(contract_data) > 0 else {},
-                '学历结构': contract_data['学历分组'].value_counts().to_dict() if len(contract_data) > 0 else {},
-                '年龄结构': contract_data['年龄段'].value_counts().to_dict() if len(contract_data) > 0 else {},
+                '总人数': self._total(contract_data),
+                '性别结构': self._count_by(contract_data, '性别'),
+                '学历结构': self._count_by(contract_data, '学历分组'),
+                '年龄结构': self._count_by(contract_data, '年龄段'),
             }
-        
+
+        # 预览模式：人数为按抽样权重推算的估计值
+        if SAMPLE_WEIGHT_COLUMN in df.columns:
+            stats['预览'] = {'抽样行数': len(df)}
+
         return stats
-    
-    def create_excel_report(self, stats: Dict) -> str:
+
+    def _preview_note(self, stats: Dict) -> str:
+        """预览报告的说明文字，扫描被截断时一并标注"""
+        preview = stats['预览']
+        note = f'注：本报告基于 {preview["抽样行数"]} 行分层抽样数据推算，人数与占比均为估计值，以正式报告为准'
+        if preview.get('部分解析'):
+            note += f'；以下文件按等间隔解析了部分行，人数按总行数放大：{"、".join(preview["部分解析"])}'
+        return note
+
+    def _format_ratio(self, value: float, total: float, estimate: bool = False) -> str:
+        """格式化占比，预览模式下标记为估计值"""
+        ratio = f'{(value / total):.1%}'
+        return f'约{ratio}' if estimate else ratio
+
+    def default_report_path(self, preview: bool = False, fmt: str = 'xlsx') -> str:
+        """默认报告输出路径"""
+        prefix = '用工月报_预览' if preview else '用工月报'
+        return os.path.join(self.file_config.output_folder, f'{prefix}_{self.current_month}.{fmt}')
+
+    def render_reports(self, stats: Dict, formats: Optional[List[str]] = None,
+                       output_files: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """同一份统计结果在线程池中并发渲染为多种格式，返回各格式报告路径（由调用方输出日志）"""
+        formats = list(dict.fromkeys(formats or self.RENDERERS))
+        output_files = output_files or {}
+        preview = '预览' in stats
+        with ThreadPoolExecutor(max_workers=len(formats)) as executor:
+            futures = {
+                fmt: executor.submit(
+                    self.render, fmt, stats, output_files.get(fmt) or self.default_report_path(preview, fmt)
+                )
+                for fmt in formats
+            }
+            return {fmt: future.result() for fmt, future in futures.items()}
+
+    def render(self, fmt: str, stats: Dict, output_file: Optional[str] = None) -> str:
+        """按格式渲染单份报告"""
+        return getattr(self, self.RENDERERS[fmt][0])(stats, output_file)
+
+    def create_excel_report(self, stats: Dict, output_file: Optional[str] = None) -> str:
+        # 显式指定输出路径时（如工作流阶段的临时产物）由调用方记录日志
+        announce = output_file is None
         wb = Workbook()
         wb.remove(wb.active) # TODO 为什么要删除默认工作表
 
+        self._create_summary_sheet(wb, stats)
+        self._create_department_sheet(wb, stats)
 
-        try:
-            self._create_summary_sheet(wb, stats)
-            self._create_department_sheet(wb, stats)
-
-            output_file = os.path.join(self.file_config.output_folder, f'用工月报_{self.current_month}.xlsx')
-            wb.save(output_file)
+        if output_file is None:
+            output_file = self.default_report_path(preview='预览' in stats)
+        wb.save(output_file)
+        if announce:
             print(f'报告已保存到: {output_file}')
-            # TODO 为什么要返回文件路径
-            return output_file
-        except Exception as e:  
-            print(f'DEBUG 错误信息: {e}')
-            # TODO 啥意思
-            import traceback
-            traceback.print_exc()
-            raise
+        # TODO 为什么要返回文件路径
+        return output_file
 
     
+    def _stat_tables(self, stats: Dict) -> List[Tuple[str, Dict, int]]:
+        """将统计结果展开为 (分类, 数据, 基数) 表格列表"""
+        total = stats['总人数']
+        tables = [
+            (title, stats.get(title, {}), total)
+            for title in ('性别结构', '学历结构', '年龄结构', '用工性质', '部门结构', '一线人员')
+        ]
+        contract_stats = stats.get('合同制员工', {})
+        if contract_stats.get('总人数', 0) > 0:
+            tables += [
+                (f'合同制员工{title}', contract_stats.get(title, {}), contract_stats['总人数'])
+                for title in ('性别结构', '学历结构', '年龄结构')
+            ]
+        return [(title, data, base) for title, data, base in tables if data]
+
+    def create_csv_report(self, stats: Dict, output_file: Optional[str] = None) -> str:
+        """CSV报告，长表格式便于导入其他系统"""
+        announce = output_file is None
+        estimate = '预览' in stats
+        if output_file is None:
+            output_file = self.default_report_path(preview=estimate, fmt='csv')
+
+        with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['分类', '项目', '人数', '占比'])
+            writer.writerow(['总人数', '', int(stats['总人数']), ''])
+            for title, data, base in self._stat_tables(stats):
+                for key, value in data.items():
+                    ratio = self._format_ratio(value, base, estimate) if base > 0 else ''
+                    writer.writerow([title, key, int(value), ratio])
+
+        if announce:
+            print(f'报告已保存到: {output_file}')
+        return output_file
+
+    def create_html_report(self, stats: Dict, output_file: Optional[str] = None) -> str:
+        """静态HTML摘要，便于邮件发送"""
+        announce = output_file is None
+        estimate = '预览' in stats
+        if output_file is None:
+            output_file = self.default_report_path(preview=estimate, fmt='html')
+
+        draft = '【预览草稿】' if estimate else ''
+        title = f'{draft}{self.current_month[:4]}年{self.current_month[4:]}月总体用工情况'
+        parts = [
+            '<!DOCTYPE html>',
+            '<html><head><meta charset="utf-8">',
+            f'<title>{html.escape(title)}</title>',
+            '<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:16px}'
+            'th,td{border:1px solid #ccc;padding:4px 12px;text-align:left}</style>',
+            '</head><body>',
+            f'<h1>{html.escape(title)}</h1>',
+        ]
+        if estimate:
+            parts.append(f'<p><em>{html.escape(self._preview_note(stats))}</em></p>')
+        parts.append(f'<p>总人数: {int(stats["总人数"])}人</p>')
+
+        for index, (table_title, data, base) in enumerate(self._stat_tables(stats)):
+            parts.append(f'<h3>{index + 1}、{html.escape(table_title)}</h3>')
+            parts.append('<table><tr><th>项目</th><th>人数</th><th>占比</th></tr>')
+            for key, value in data.items():
+                ratio = self._format_ratio(value, base, estimate) if base > 0 else ''
+                parts.append(f'<tr><td>{html.escape(str(key))}</td><td>{int(value)}</td><td>{ratio}</td></tr>')
+            parts.append('</table>')
+        parts.append('</body></html>')
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(parts))
+
+        if announce:
+            print(f'报告已保存到: {output_file}')
+        return output_file
+
+    def create_json_report(self, stats: Dict, output_file: Optional[str] = None) -> str:
+        """JSON报告，供内网页面使用"""
+        announce = output_file is None
+        estimate = '预览' in stats
+        if output_file is None:
+            output_file = self.default_report_path(preview=estimate, fmt='json')
+
+        payload = {
+            '月份': self.current_month,
+            '估计值': estimate,
+            '总人数': int(stats['总人数']),
+            '分类': [
+                {
+                    '名称': title,
+                    '基数': int(base),
+                    '明细': [
+                        {'项目': str(key), '人数': int(value), '占比': round(value / base, 4) if base > 0 else None}
+                        for key, value in data.items()
+                    ],
+                }
+                for title, data, base in self._stat_tables(stats)
+            ],
+        }
+        if estimate:
+            payload['抽样行数'] = int(stats['预览']['抽样行数'])
+            payload['部分解析'] = list(stats['预览'].get('部分解析', []))
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+
+        if announce:
+            print(f'报告已保存到: {output_file}')
+        return output_file
+
+    def create_consolidated_report(self, org_stats: Dict[str, Dict], output_file: Optional[str] = None,
+                                   failed_orgs: Optional[List[str]] = None) -> str:
+        """跨分公司汇总报告，每个分公司一行；处理失败的分公司单独标注，合计行标记为不完整"""
+        failed_orgs = failed_orgs or []
+        if output_file is None:
+            output_file = os.path.join(self.file_config.output_folder, f'用工月报_汇总_{self.current_month}.xlsx')
+
+        # 用工性质列：先按枚举顺序，再追加其他出现过的类别
+        employee_types = [t.value for t in EmployeeType]
+        for stats in org_stats.values():
+            employee_types += [t for t in stats.get('用工性质', {}) if t not in employee_types]
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = '分公司汇总'
+        ws['A1'] = f'{self.current_month[:4]}年{self.current_month[4:]}月各分公司用工情况汇总'
+        ws['A1'].font = Font(size=16, bold=True)
+        if failed_orgs:
+            ws['A2'] = f'注：{"、".join(failed_orgs)} 处理失败，未计入合计，汇总数据不完整'
+            ws['A2'].font = Font(bold=True, color='FF0000')
+
+        headers = ['分公司', '总人数', '合同制员工', '合同制占比'] + employee_types
+        for col, header in enumerate(headers, start=1):
+            ws.cell(row=3, column=col, value=header).font = Font(bold=True)
+
+        totals = [0] * (len(headers) - 1)
+        row = 4
+        for org_name, stats in org_stats.items():
+            total = stats['总人数']
+            contract = stats.get('合同制员工', {}).get('总人数', 0)
+            type_counts = [stats.get('用工性质', {}).get(t, 0) for t in employee_types]
+            values = [total, contract, self._format_ratio(contract, total) if total > 0 else ''] + type_counts
+            ws.cell(row=row, column=1, value=org_name)
+            for col, value in enumerate(values, start=2):
+                ws.cell(row=row, column=col, value=value)
+            for index, value in enumerate(values):
+                if index != 2:
+                    totals[index] += value
+            row += 1
+
+        for org_name in failed_orgs:
+            ws.cell(row=row, column=1, value=org_name)
+            ws.cell(row=row, column=2, value='处理失败').font = Font(color='FF0000')
+            row += 1
+
+        total_label = f'合计（不完整，缺少{len(failed_orgs)}个分公司）' if failed_orgs else '合计'
+        ws.cell(row=row, column=1, value=total_label).font = Font(bold=True)
+        if totals[0] > 0:
+            totals[2] = self._format_ratio(totals[1], totals[0])
+        else:
+            totals[2] = ''
+        for col, value in enumerate(totals, start=2):
+            ws.cell(row=row, column=col, value=value).font = Font(bold=True)
+
+        wb.save(output_file)
+        print(f'汇总报告已保存到: {output_file}')
+        return output_file
+
     # TODO 在方法面前加下划线是什么意思
     def _create_summary_sheet(self, workbook: Workbook, stats: Dict):
         ws = workbook.create_sheet('用工总体情况')
 
-        print(f"DEBUG: current_month for title: {self.current_month}, type: {type(self.current_month)}")
-
-        # 检查数据类型
-        try:
-            title = f'{self.current_month[:4]}年{self.current_month[4:]}月总体用工情况'
-            print(f"DEBUG: title created successfully: {title}")
-            ws['A1'] = title
-        except Exception as e:
-            print(f"DEBUG: Error creating title: {e}")
-            raise
-
+        estimate = '预览' in stats
+        draft = '【预览草稿】' if estimate else ''
 
         # 设置标题
-        ws['A1'] = f'{self.current_month[:4]}年{self.current_month[4:]}月总体用工情况'
+        ws['A1'] = f'{draft}{self.current_month[:4]}年{self.current_month[4:]}月总体用工情况'
         ws['A1'].font = Font(size=16, bold=True)
         ws.merge_cells('A1:D1')
 
         row = 3
+        if estimate:
+            ws[f'A{row}'] = self._preview_note(stats)
+            ws[f'A{row}'].font = Font(italic=True)
+            row += 2
 
         structure_items = [
             ('性别结构', stats['性别结构']),
@@ -115,11 +353,11 @@ class ReportGenerator:
                 ws[f'A{row}'] = key
                 ws[f'B{row}'] = value
                 if stats['总人数'] > 0:
-                    ws[f'C{row}'] = f'{(value/stats["总人数"]):.1%}'
+                    ws[f'C{row}'] = self._format_ratio(value, stats['总人数'], estimate)
                 row += 1
             row += 1
 
-        contract_stats = stats.get('合同制', {})
+        contract_stats = stats.get('合同制员工', {})
         if contract_stats.get('总人数', 0) > 0:
             ws[f'A{row}'] = '二、合同制员工结构分析'
             ws[f'A{row}'].font = Font(bold=True, size=12)
@@ -142,15 +380,18 @@ class ReportGenerator:
                     ws[f'A{row}'] = key
                     ws[f'B{row}'] = value
                     if contract_stats['总人数'] > 0:
-                        ws[f'C{row}'] = f'{(value/contract_stats["总人数"]):.1%}'
+                        ws[f'C{row}'] = self._format_ratio(value, contract_stats['总人数'], estimate)
                     row += 1
             row += 1
         
     def _create_department_sheet(self, workbook: Workbook, stats: Dict):
         ws = workbook.create_sheet('部门结构')
 
+        estimate = '预览' in stats
+        draft = '【预览草稿】' if estimate else ''
+
         # 设置标题
-        ws['A1'] = f'{self.current_month[:4]}年{self.current_month[4:]}月部门结构'
+        ws['A1'] = f'{draft}{self.current_month[:4]}年{self.current_month[4:]}月部门结构'
         ws['A1'].font = Font(size=16, bold=True)
         ws.merge_cells('A1:C1')
 
@@ -173,5 +414,5 @@ class ReportGenerator:
             ws[f'A{row}'] = dept
             ws[f'B{row}'] = count
             if stats['总人数'] > 0:
-                ws[f'C{row}'] = f'{(count/stats["总人数"]):1.%}'
+                ws[f'C{row}'] = self._format_ratio(count, stats['总人数'], estimate)
             row += 1
\ No newline at end of file
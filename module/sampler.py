@@ -0,0 +1,162 @@
+"""
+分层抽样模块
+为预览模式按部门和用工性质从Excel中抽取有界样本
+"""
+import os
+import re
+import random
+import zipfile
+import pandas as pd
+from xml.etree.ElementTree import fromstring
+from openpyxl import load_workbook
+from openpyxl.worksheet._reader import WorkSheetParser
+from config.config import STRATIFY_COLUMNS, SAMPLE_WEIGHT_COLUMN
+from typing import Dict, List, Optional, Tuple
+
+# 工作表XML中的行起始标签与根元素（兼容带命名空间前缀的写法）
+ROW_START = re.compile(rb'<(?:\w+:)?row[\s>/]')
+ROW_END = re.compile(rb'</(?:\w+:)?row>')
+WORKSHEET_ROOT = re.compile(rb'<((?:\w+:)?)worksheet\b[^>]*>')
+
+
+class StratifiedSampler:
+    """分层蓄水池抽样
+
+    每个文件最多解析max_scan_rows行数据（None表示全部解析）。数据行超过该上限时，
+    先在工作表XML中定位全部行，再按等间隔解析其中max_scan_rows行，因此样本覆盖整个工作表，
+    按部门排序的花名册也不会漏掉靠后的部门；总行数来自实际的行元素计数，不依赖工作表的维度声明。
+    部分解析的文件记录在partial_files中，供报告标注。
+    内存占用为 分层数 × sample_size 行：每层的蓄水池最多保留sample_size行，
+    以便任一层按比例分得全部样本量时仍有足够的行可选。
+    """
+    def __init__(self, sample_size: int = 2000, max_scan_rows: Optional[int] = 10000, seed: int = 0):
+        self.sample_size = sample_size
+        self.max_scan_rows = max_scan_rows
+        self.seed = seed
+        self.partial_files: List[str] = []
+
+    def _read_rows_evenly(self, file_path: str) -> Optional[Tuple[List[str], List[tuple], int, int]]:
+        """在工作表XML中等间隔解析数据行，返回 (表头, 非空数据行, 解析行数, 数据总行数)；无法识别工作表结构时返回None"""
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            with zipfile.ZipFile(file_path) as archive:
+                xml = archive.read(ws._worksheet_path.lstrip('/'))
+            root = WORKSHEET_ROOT.search(xml)
+            starts = [match.start() for match in ROW_START.finditer(xml)]
+            if root is None or not starts:
+                return None
+
+            wrapper_open = root.group(0)
+            wrapper_close = b'</' + root.group(1) + b'worksheet>'
+            parser = WorkSheetParser(None, ws._shared_strings, data_only=True, epoch=wb.epoch,
+                                     date_formats=wb._date_formats, timedelta_formats=wb._timedelta_formats)
+
+            def parse(start: int) -> Tuple[int, dict]:
+                tag_end = xml.index(b'>', start)
+                if xml[tag_end - 1:tag_end] == b'/':
+                    fragment = xml[start:tag_end + 1]
+                else:
+                    fragment = xml[start:ROW_END.search(xml, tag_end).end()]
+                row_idx, cells = parser.parse_row(fromstring(wrapper_open + fragment + wrapper_close)[0])
+                return row_idx, {cell['column']: cell['value'] for cell in cells}
+
+            # 与 pd.read_excel(skiprows=1) 一致：第1行为标题，第2行为表头
+            header_pos = None
+            for pos, start in enumerate(starts[:2]):
+                row_idx, values = parse(start)
+                if row_idx >= 2:
+                    header_pos, header_values = pos, values
+                    break
+            if header_pos is None:
+                return None
+
+            width = max(header_values) if header_values else 0
+            header = [str(header_values.get(col, '') or '').strip() for col in range(1, width + 1)]
+            data_starts = starts[header_pos + 1:]
+            total = len(data_starts)
+            if self.max_scan_rows is not None and total > self.max_scan_rows:
+                picked_starts = [data_starts[i * total // self.max_scan_rows] for i in range(self.max_scan_rows)]
+            else:
+                picked_starts = data_starts
+
+            rows = []
+            for start in picked_starts:
+                _, values = parse(start)
+                row = tuple(values.get(col) for col in range(1, width + 1))
+                if any(value is not None for value in row):
+                    rows.append(row)
+            return header, rows, len(picked_starts), total
+        finally:
+            wb.close()
+
+    def _read_rows_streaming(self, file_path: str) -> Tuple[List[str], List[tuple], int, int]:
+        """逐行读取全部数据行，作为无法定位行元素时的后备方式"""
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            next(rows, None)
+            header_row = next(rows, None) or ()
+            header = [str(col).strip() if col is not None else '' for col in header_row]
+            data = [row for row in rows if row is not None and any(value is not None for value in row)]
+            return header, data, len(data), len(data)
+        finally:
+            wb.close()
+
+    def sample_file(self, file_path: str) -> Optional[pd.DataFrame]:
+        """按分层列抽样，返回带抽样权重列的数据"""
+        if not os.path.exists(file_path):
+            print(f"文件 {file_path} 不存在")
+            return None
+
+        rng = random.Random(self.seed)
+        result = self._read_rows_evenly(file_path)
+        if result is None:
+            result = self._read_rows_streaming(file_path)
+        header, rows, parsed_rows, total_rows = result
+        if not header:
+            return pd.DataFrame()
+
+        stratum_indexes = [header.index(col) if col in header else None for col in STRATIFY_COLUMNS]
+        # 每层蓄水池抽样，单层最多保留sample_size行
+        reservoirs: Dict[Tuple, List] = {}
+        seen: Dict[Tuple, int] = {}
+        for row in rows:
+            key = tuple(row[i] if i is not None and i < len(row) else None for i in stratum_indexes)
+            count = seen.get(key, 0) + 1
+            seen[key] = count
+            reservoir = reservoirs.setdefault(key, [])
+            if len(reservoir) < self.sample_size:
+                reservoir.append(row)
+            else:
+                slot = rng.randrange(count)
+                if slot < self.sample_size:
+                    reservoir[slot] = row
+
+        scanned = sum(seen.values())
+        if scanned == 0:
+            return pd.DataFrame(columns=header + [SAMPLE_WEIGHT_COLUMN])
+
+        # 部分解析时，各层人数按数据总行数与解析行数之比放大
+        scale = 1.0
+        partial = parsed_rows < total_rows
+        if partial:
+            scale = total_rows / parsed_rows
+            self.partial_files.append(
+                f"{os.path.basename(file_path)}（等间隔解析 {parsed_rows} / {total_rows} 行）"
+            )
+
+        # 按各层规模比例分配样本量，每层至少保留1行
+        sampled_rows = []
+        for key, reservoir in reservoirs.items():
+            stratum_total = seen[key]
+            quota = max(1, round(self.sample_size * stratum_total / scanned))
+            picked = reservoir if quota >= len(reservoir) else rng.sample(reservoir, quota)
+            weight = stratum_total * scale / len(picked)
+            for row in picked:
+                padded = (list(row) + [None] * len(header))[:len(header)]
+                sampled_rows.append(padded + [weight])
+
+        scan_note = f"等间隔解析 {parsed_rows} / {total_rows} 行" if partial else f"共 {total_rows} 行"
+        print(f"文件 {os.path.basename(file_path)} {scan_note}，抽样 {len(sampled_rows)} 行，分层 {len(seen)} 个")
+        return pd.DataFrame(sampled_rows, columns=header + [SAMPLE_WEIGHT_COLUMN])